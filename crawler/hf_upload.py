@@ -0,0 +1,108 @@
+# crawler/hf_upload.py
+# Publishes the JSONL shards to the Hugging Face dataset repository.
+
+import os
+import sys
+from pathlib import Path
+import argparse
+
+from huggingface_hub import HfApi
+
+# Ensure the package is importable when executed directly as a script.
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from crawler.shards import SHARD_PREFIX, SHARD_SUFFIX, is_lfs_pointer
+
+DATA_DIR = "data"
+
+
+def local_shards(data_dir: str) -> list:
+    """
+    Lists the shards in data_dir whose content is present locally.
+
+    A checkout without Git LFS content leaves pointer files for older shards;
+    uploading those would overwrite the real shards on the Hub, so they are
+    left out, as are empty shards.
+    """
+    return sorted(
+        name
+        for name in os.listdir(data_dir)
+        if name.startswith(SHARD_PREFIX)
+        and name.endswith(SHARD_SUFFIX)
+        and os.path.getsize(os.path.join(data_dir, name)) > 0
+        and not is_lfs_pointer(os.path.join(data_dir, name))
+    )
+
+
+def upload_shards(
+    repo_id: str, data_dir: str = DATA_DIR, token: str = None, private: bool = False
+) -> int:
+    """
+    Uploads all JSONL shards in data_dir to a Hugging Face dataset in one commit.
+
+    Git LFS pointer files are left out, and files whose content is already
+    on the Hub are skipped by the client, so only new or changed shards are
+    transferred. Shards are stored at the root of the dataset repository.
+
+    Args:
+        repo_id: The dataset repository, e.g. "user/dataset".
+        data_dir: The directory containing the shards.
+        token: A Hugging Face access token; defaults to the HF_TOKEN variable.
+        private: Whether to create the dataset as private if it does not exist.
+
+    Returns:
+        The number of shards included in the upload.
+    """
+    shards = local_shards(data_dir)
+    if not shards:
+        return 0
+
+    api = HfApi(token=token)
+    api.create_repo(repo_id, repo_type="dataset", private=private, exist_ok=True)
+    api.upload_folder(
+        repo_id=repo_id,
+        repo_type="dataset",
+        folder_path=data_dir,
+        allow_patterns=shards,
+        commit_message="Update dataset from crawler run",
+    )
+    return len(shards)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Upload the JSONL shards to the Hugging Face dataset"
+    )
+    parser.add_argument(
+        "--repo-id",
+        default=os.environ.get("HF_DATASET_REPO"),
+        help="Dataset repository to upload to (default: $HF_DATASET_REPO)",
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=DATA_DIR,
+        help="Directory where JSONL shards are stored",
+    )
+    args = parser.parse_args()
+    if not args.repo_id:
+        parser.error("--repo-id or HF_DATASET_REPO is required")
+    return args
+
+
+def main() -> None:
+    """Uploads the shards using the token from HF_TOKEN."""
+    args = parse_args()
+    uploaded = upload_shards(
+        args.repo_id,
+        args.data_dir,
+        token=os.environ.get("HF_TOKEN"),
+        private=os.environ.get("HF_PRIVATE", "").lower() == "true",
+    )
+    print(f"Uploaded {uploaded} shards from {args.data_dir} to {args.repo_id}.")
+
+
+if __name__ == "__main__":
+    main()
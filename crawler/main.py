@@ -1,30 +1,56 @@
 # crawler/main.py
 # Main entry point for the Tuchtrecht crawler.
 
+import multiprocessing
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from datetime import datetime, timezone
-import jsonlines
+from typing import Optional
 import argparse
 
+from tqdm import tqdm
+
 # Ensure the package is importable when executed directly as a script.
 ROOT_DIR = Path(__file__).resolve().parent.parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from crawler.sru_client import get_records
+from crawler.sru_client import SRUError, get_records
 from crawler.parser import parse_record
-from crawler.scrubber import scrub_text
+from crawler.scrubber import scrub_record
+from crawler.pipeline import bounded_map
+from crawler.shards import ShardedWriter, count_shard_records, find_latest_shard, iter_shard_urls
+from crawler.visited import VisitedLog, load_visited, url_fingerprint
 
 DATA_DIR = "data"
 LAST_UPDATE_FILE = ".last_update"
+# Log of every ruling URL saved to a shard, kept in the data directory. Full
+# backlog crawls skip rulings listed in it without downloading them again.
+VISITED_FILENAME = "visited.txt"
 BASE_QUERY = "c.product-area==tuchtrecht"
 # Maximum number of entries per JSONL shard. The Hugging Face upload
 # workflow rejects files larger than ~10MiB, which roughly equals 350
 # records. Keeping the shards small ensures uploads succeed.
 RECORDS_PER_SHARD = 350
 DEFAULT_MAX_RECORDS = 10000
+# Records are handed to the shard file in batches, so a run issues a handful
+# of write() syscalls per shard instead of one per record.
+WRITE_BATCH_SIZE = 100
+# Full texts are downloaded on a thread pool; the SRU listing itself is paged
+# sequentially and feeds the pool as results are consumed. Name scrubbing is
+# CPU-bound and runs on a process pool so it does not contend for the GIL.
+# Keep the worker count below sru_client.POOL_MAXSIZE so every thread reuses
+# a pooled keep-alive connection.
+DEFAULT_WORKERS = 8
+DEFAULT_PROCESSES = os.cpu_count() or 1
+# Scrub workers are started lazily, once the download and SRU prefetch threads
+# and the shared locks in sru_client are live. Forking such a process can
+# deadlock the child, so workers are spawned fresh; they only receive
+# picklable record dicts.
+SCRUB_MP_CONTEXT = "spawn"
 
 
 def get_last_run_date():
@@ -41,6 +67,14 @@ def save_last_run_date():
         f.write(datetime.now(timezone.utc).isoformat())
 
 
+def flush_batch(writer: ShardedWriter, visited_log: VisitedLog, urls: list) -> None:
+    """Writes the pending records to the shard, then logs and clears their URLs."""
+    writer.flush()
+    if urls:
+        visited_log.append(urls)
+        urls.clear()
+
+
 def parse_args() -> argparse.Namespace:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Run the Tuchtrecht crawler")
@@ -55,56 +89,93 @@ def parse_args() -> argparse.Namespace:
         default=DEFAULT_MAX_RECORDS,
         help="Maximum number of records to process in a single run",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Number of rulings to download concurrently",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=DEFAULT_PROCESSES,
+        help="Number of processes used to scrub names from the content",
+    )
     return parser.parse_args()
 
 
-def main() -> None:
-    """Main function to run the crawler."""
-    args = parse_args()
+def crawl(
+    data_dir: str = DATA_DIR,
+    max_records: Optional[int] = DEFAULT_MAX_RECORDS,
+    workers: int = DEFAULT_WORKERS,
+    processes: int = DEFAULT_PROCESSES,
+    scrub: bool = True,
+    reset: bool = False,
+) -> int:
+    """
+    Fetches new rulings and appends them to the JSONL shards in data_dir.
 
-    if args.reset and os.path.exists(LAST_UPDATE_FILE):
+    Args:
+        data_dir: The directory holding the shards and the visited log.
+        max_records: The maximum number of records to save, or None for no limit.
+        workers: The number of rulings to download concurrently.
+        processes: The number of processes used to scrub names.
+        scrub: Whether to scrub names from the content.
+        reset: Whether to ignore the last update timestamp and crawl the
+            full backlog.
+
+    Returns:
+        The number of records saved.
+    """
+    if reset and os.path.exists(LAST_UPDATE_FILE):
         os.remove(LAST_UPDATE_FILE)
 
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
-        if os.path.exists(LAST_UPDATE_FILE) and not args.reset:
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+        if os.path.exists(LAST_UPDATE_FILE) and not reset:
             print("Data directory missing. Removing stale last update timestamp.")
             os.remove(LAST_UPDATE_FILE)
 
-    last_run_date = None if args.reset else get_last_run_date()
+    last_run_date = None if reset else get_last_run_date()
 
     if last_run_date:
         print(f"Performing weekly update since last run on: {last_run_date}")
     else:
         print("Performing full backlog crawl.")
-    print(f"Maximum records this run: {args.max_records}")
+    if max_records is not None:
+        print(f"Maximum records this run: {max_records}")
+    print(f"Download workers: {workers}")
 
     records_iterator = get_records(BASE_QUERY, start_date=last_run_date)
+    visited_file = os.path.join(data_dir, VISITED_FILENAME)
+    if not os.path.exists(visited_file):
+        # Data written before the visited log existed: rebuild it from the
+        # shards whose content is checked out, so they are not fetched again.
+        seeded_urls = list(iter_shard_urls(data_dir))
+        if seeded_urls:
+            with VisitedLog(visited_file) as visited_log:
+                visited_log.append(seeded_urls)
+            print(f"Seeded visited log with {len(seeded_urls)} URLs from existing shards.")
+    visited = load_visited(visited_file)
+    # Updates query rulings modified since the last run, which includes
+    # corrections to rulings that were already saved, so only full backlog
+    # crawls skip URLs that are in the visited log.
+    skip_visited = visited if not last_run_date else None
 
     shard_index = 0
     records_in_current_shard = 0
 
     # Find the latest shard index to append to it.
-    existing_shards = [
-        f for f in os.listdir(DATA_DIR) if f.startswith("tuchtrecht_shard_") and f.endswith(".jsonl")
-    ]
-    if existing_shards:
-        # Sort to ensure we get the highest index
-        existing_shards.sort()
-        latest_shard_file = existing_shards[-1]
+    latest_shard_file = find_latest_shard(data_dir)
+    if latest_shard_file:
         try:
             shard_index = int(latest_shard_file.split("_")[-1].split(".")[0])
-            # Check if the latest shard is full by attempting to read it
-            with jsonlines.open(
-                os.path.join(DATA_DIR, latest_shard_file), mode="r"
-            ) as reader:
-                # Iterate and count records, handling potential InvalidLineError
-                for _ in reader:
-                    records_in_current_shard += 1
-            if records_in_current_shard >= RECORDS_PER_SHARD:
-                shard_index += 1
-                records_in_current_shard = 0
-        except (jsonlines.InvalidLineError, ValueError) as e:
+            # Count the records in the latest shard; the writer moves on to
+            # a new shard by itself if this one is already full.
+            records_in_current_shard = count_shard_records(
+                os.path.join(data_dir, latest_shard_file)
+            )
+        except ValueError as e:
             print(f"Warning: Could not read or parse existing shard {latest_shard_file}. Starting new shard. Error: {e}")
             shard_index += 1 # Start a new shard if existing one is corrupt
             records_in_current_shard = 0
@@ -113,40 +184,86 @@ def main() -> None:
             shard_index += 1
             records_in_current_shard = 0
 
-    output_file = os.path.join(DATA_DIR, f"tuchtrecht_shard_{shard_index:03d}.jsonl")
-    writer = jsonlines.open(output_file, mode="a")
+    writer = ShardedWriter(
+        data_dir, shard_index, records_in_current_shard, RECORDS_PER_SHARD
+    )
+    visited_log = VisitedLog(visited_file)
+    batch_urls = []
 
     processed_count = 0
-    for record in records_iterator:
-        parsed = parse_record(record)
-        if parsed:
-            parsed["Content"] = scrub_text(parsed["Content"])
-
-            writer.write(parsed)
-            processed_count += 1
-            records_in_current_shard += 1
-            print(f"Saved record {processed_count}: {parsed['URL']}")
-
-            if processed_count >= args.max_records:
-                print(f"Reached max-records limit ({args.max_records}). Stopping early.")
-                break
-
-            if records_in_current_shard >= RECORDS_PER_SHARD:
-                writer.close()
-                shard_index += 1
-                records_in_current_shard = 0
-                output_file = os.path.join(
-                    DATA_DIR, f"tuchtrecht_shard_{shard_index:03d}.jsonl"
-                )
-                writer = jsonlines.open(output_file, mode="w")
-
-    writer.close()
+    paging_failed = False
+    executor = ThreadPoolExecutor(max_workers=workers)
+    scrub_pool = (
+        ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context(SCRUB_MP_CONTEXT),
+        )
+        if scrub
+        else None
+    )
+    try:
+        parsed_records = (
+            parsed
+            for parsed in bounded_map(
+                executor,
+                partial(parse_record, visited=skip_visited),
+                records_iterator,
+                workers * 2,
+            )
+            if parsed
+        )
+        if scrub_pool:
+            parsed_records = bounded_map(
+                scrub_pool, scrub_record, parsed_records, processes * 2
+            )
+        with tqdm(desc="Saved", unit="rec", mininterval=1.0) as progress:
+            for parsed in parsed_records:
+                writer.write(parsed)
+                batch_urls.append(parsed["URL"])
+                visited.add(url_fingerprint(parsed["URL"]))
+                processed_count += 1
+                progress.set_postfix_str(parsed["URL"][-40:], refresh=False)
+                progress.update()
+
+                if len(batch_urls) >= WRITE_BATCH_SIZE:
+                    flush_batch(writer, visited_log, batch_urls)
+
+                if max_records is not None and processed_count >= max_records:
+                    progress.write(f"Reached max-records limit ({max_records}). Stopping early.")
+                    break
+    except SRUError as e:
+        print(e)
+        paging_failed = True
+    finally:
+        executor.shutdown(cancel_futures=True)
+        if scrub_pool:
+            scrub_pool.shutdown(cancel_futures=True)
+        flush_batch(writer, visited_log, batch_urls)
+        writer.close()
+        visited_log.close()
 
     print(f"Processed and saved {processed_count} records.")
 
-    if processed_count > 0 or not last_run_date:
+    if paging_failed:
+        # Rulings on the pages that were not fetched would be skipped by the
+        # next update if the timestamp moved on.
+        print("SRU paging ended on an error; keeping the last update timestamp.")
+    elif processed_count > 0 or not last_run_date:
         save_last_run_date()
 
+    return processed_count
+
+
+def main() -> None:
+    """Main function to run the crawler."""
+    args = parse_args()
+    crawl(
+        max_records=args.max_records,
+        workers=args.workers,
+        processes=args.processes,
+        reset=args.reset,
+    )
+
 
 if __name__ == "__main__":
     main()
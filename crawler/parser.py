@@ -1,18 +1,75 @@
 # crawler/parser.py
 # This module is responsible for parsing the XML responses from the SRU endpoint.
 
-from typing import Dict, Any, Optional
+from typing import AbstractSet, Dict, Iterable, Optional
 
 import requests
-import xml.etree.ElementTree as ET
+from lxml import etree
 
-from .sru_client import get_session
+from .sru_client import LIMITER, NS, SESSION
+from .visited import url_fingerprint
 
-_SESSION = get_session()
+# Size of the chunks in which a ruling is read from the socket and fed to the
+# parser.
+CHUNK_SIZE = 64 * 1024
+
+class _TextCollector:
+    """
+    lxml parser target that keeps only the character data of a document.
+
+    Used as a parser target no element tree is built at all: text arrives
+    through data() in document order and the rest of the markup is dropped.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def start(self, tag, attrib):
+        pass
+
+    def end(self, tag):
+        pass
+
+    def data(self, data):
+        self._chunks.append(data)
+
+    def close(self) -> str:
+        return "".join(self._chunks)
+
+def extract_text(chunks: Iterable[bytes]) -> str:
+    """
+    Returns the concatenated text of all elements in an XML document.
+
+    The document is fed to the parser incrementally, so parsing can proceed
+    while the rest of it is still being received.
+
+    Args:
+        chunks: The raw XML document as consecutive byte chunks.
+
+    Returns:
+        The text content, equal to "".join(root.itertext()).
+
+    Raises:
+        lxml.etree.XMLSyntaxError: If the document is not well-formed.
+    """
+    # Parsers carry per-document state, so each call gets its own. Long
+    # rulings must not trip libxml2's size limits, and external entities are
+    # never fetched over the network. Blank text is kept, as it separates
+    # the paragraphs in the extracted content.
+    parser = etree.XMLParser(
+        target=_TextCollector(),
+        huge_tree=True,
+        resolve_entities=False,
+        no_network=True,
+        collect_ids=False,
+    )
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
 
 def get_full_text(url: str) -> Optional[str]:
     """
-    Fetches the full text content from a given URL using a session with retry.
+    Fetches the full text content from a given URL using the shared session with retry.
 
     Args:
         url: The URL of the XML file.
@@ -21,56 +78,58 @@ def get_full_text(url: str) -> Optional[str]:
         The extracted full text as a string, or None if fetching fails.
     """
     try:
-        response = _SESSION.get(url)
-        response.raise_for_status()
-        # We assume the content is XML and needs parsing to extract text.
-        # This is a simple text extraction. More complex XML structures might need a more robust parser.
-        root = ET.fromstring(response.content)
-        # Concatenate all text from all elements
-        return "".join(root.itertext())
+        LIMITER.acquire()
+        with SESSION.get(url, stream=True) as response:
+            response.raise_for_status()
+            # We assume the content is XML and needs parsing to extract text.
+            # This is a simple text extraction. More complex XML structures might need a more robust parser.
+            # Concatenate all text from all elements
+            return extract_text(response.iter_content(chunk_size=CHUNK_SIZE))
     except requests.exceptions.RequestException as e:
         print(f"Failed to fetch full text from {url}: {e}")
-    except ET.ParseError as e:
+    except etree.XMLSyntaxError as e:
         print(f"Failed to parse XML from {url}: {e}")
     return None
 
-def parse_record(record: Dict[str, Any]) -> Optional[Dict[str, str]]:
+# Field lookups on sru:record elements, compiled once. string() yields "" when
+# the element is missing.
+_ENRICHED_DATA = 'sru:recordData/gzd:gzd/gzd:enrichedData'
+_XML_ITEM_URL = etree.XPath(
+    f"string({_ENRICHED_DATA}/gzd:itemUrl[@manifestation='xml'][1])", namespaces=NS
+)
+_PDF_ITEM_URL = etree.XPath(
+    f"string({_ENRICHED_DATA}/gzd:itemUrl[@manifestation='pdf'][1])", namespaces=NS
+)
+_RECORD_URL = etree.XPath(f"string({_ENRICHED_DATA}/gzd:url)", namespaces=NS)
+
+
+def parse_record(
+    record: etree._Element, visited: Optional[AbstractSet[int]] = None
+) -> Optional[Dict[str, str]]:
     """
     Parses a single SRU record to extract URL, content, and source.
 
     Args:
-        record: A dictionary representing a single SRU record.
+        record: The sru:record element of a single SRU record.
+        visited: Optional fingerprints of URLs that were already saved. Such
+            records are skipped before their full text is downloaded.
 
     Returns:
-        A dictionary with "URL", "Content", and "Source", or None if parsing fails.
+        A dictionary with "URL", "Content", and "Source", or None if parsing fails
+        or the record was already saved.
     """
     try:
-        record_data = record.get('sru:recordData', {}).get('gzd:gzd', {})
-        enriched_data = record_data.get('gzd:enrichedData', {})
-        
         # Prefer XML URL for full text extraction
-        item_urls = enriched_data.get('gzd:itemUrl', [])
-        if not isinstance(item_urls, list):
-            item_urls = [item_urls]
-            
-        xml_url = None
-        for item in item_urls:
-            if item.get('@manifestation') == 'xml':
-                xml_url = item.get('#text')
-                break
-        
-        pdf_url = None
-        if not xml_url:
-            for item in item_urls:
-                if item.get('@manifestation') == 'pdf':
-                    pdf_url = item.get('#text')
-                    break
-
-        target_url = xml_url or pdf_url or enriched_data.get('gzd:url')
+        xml_url = _XML_ITEM_URL(record).strip()
+        pdf_url = _PDF_ITEM_URL(record).strip() if not xml_url else ''
+        target_url = xml_url or pdf_url or _RECORD_URL(record).strip()
 
         if not target_url:
             return None
 
+        if visited is not None and url_fingerprint(target_url) in visited:
+            return None
+
         content = get_full_text(target_url) if xml_url else "Content from non-XML source, e.g., PDF, not extracted."
         
         if not content:
@@ -0,0 +1,42 @@
+# crawler/pipeline.py
+# Helpers for running crawl stages concurrently while preserving record order.
+
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def bounded_map(
+    executor: Executor, fn: Callable[[T], R], items: Iterable[T], window: int
+) -> Iterator[R]:
+    """
+    Applies a function to items on an executor and yields the results in order.
+
+    Unlike Executor.map, the input is consumed lazily: at most `window` calls
+    are in flight at once, so a paginated iterator is only advanced as fast as
+    its results are used. Calls that have not started yet are cancelled when
+    the consumer stops early.
+
+    Args:
+        executor: The executor to run the calls on.
+        fn: The function to apply to each item.
+        items: The input iterable.
+        window: The maximum number of submitted but unconsumed calls.
+
+    Yields:
+        The result of fn for each item, in input order.
+    """
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -1,4 +1,5 @@
 import re
+from typing import Dict
 
 # Patterns for common titles followed by personal names (e.g. "mr. Jansen")
 _TITLE_NAME_PATTERN = re.compile(
@@ -22,29 +23,34 @@ _GEMACHTIGDE_PATTERN = re.compile(
     r"(?i)(gemachtigde[^\n]{0,10}?(?:mr\.?\s*)?)((?:[A-Za-zÀ-ÖØ-öø-ÿ.'`-]+\s*){1,5})"
 )
 
+# Replacement templates keep the matched keyword and expand in C, avoiding a
+# Python callback per match.
+_KEYWORD_NAAM = r"\g<1> NAAM"
+_PREFIX_NAAM = r"\g<1>NAAM"
+
 def scrub_title_names(text: str) -> str:
     """Replace titles followed by names with a placeholder."""
     if not text:
         return text
-    return _TITLE_NAME_PATTERN.sub(lambda m: f"{m.group(1)} NAAM", text)
+    return _TITLE_NAME_PATTERN.sub(_KEYWORD_NAAM, text)
 
 def scrub_party_names(text: str) -> str:
     """Replace 'klager' or 'verweerder' names with a placeholder."""
     if not text:
         return text
-    return _PARTY_PATTERN.sub(lambda m: f"{m.group(1)} NAAM", text)
+    return _PARTY_PATTERN.sub(_KEYWORD_NAAM, text)
 
 def scrub_courtesy_names(text: str) -> str:
     """Replace courtesy titles followed by names with a placeholder."""
     if not text:
         return text
-    return _COURTESY_PATTERN.sub(lambda m: f"{m.group(1)} NAAM", text)
+    return _COURTESY_PATTERN.sub(_KEYWORD_NAAM, text)
 
 def scrub_gemachtigde_names(text: str) -> str:
     """Replace names following 'gemachtigde' with 'NAAM'."""
     if not text:
         return text
-    return _GEMACHTIGDE_PATTERN.sub(lambda m: f"{m.group(1)}NAAM", text)
+    return _GEMACHTIGDE_PATTERN.sub(_PREFIX_NAAM, text)
 
 def scrub_text(text: str) -> str:
     """Apply all available name scrubbing rules."""
@@ -55,3 +61,8 @@ def scrub_text(text: str) -> str:
     text = scrub_courtesy_names(text)
     text = scrub_gemachtigde_names(text)
     return text
+
+def scrub_record(record: Dict[str, str]) -> Dict[str, str]:
+    """Apply all name scrubbing rules to the content of a parsed record."""
+    record["Content"] = scrub_text(record["Content"])
+    return record
@@ -0,0 +1,235 @@
+# crawler/shards.py
+# Reading and writing of the JSONL shards under the data directory.
+
+import os
+from typing import Iterator, Optional
+
+import orjson
+
+SHARD_PREFIX = "tuchtrecht_shard_"
+SHARD_SUFFIX = ".jsonl"
+# Sidecar file in the data directory holding the index of the shard that is
+# currently being appended to, so startup does not need to list the directory.
+LATEST_SHARD_FILE = ".latest_shard"
+# Shard files are written through a large buffer so that a batch of ~30KB
+# records reaches the OS in a few write() calls.
+WRITE_BUFFER_SIZE = 1024 * 1024
+# Shards checked out without Git LFS content are small pointer files that
+# start with this line instead of a JSON record.
+LFS_POINTER_PREFIX = b"version https://git-lfs"
+
+
+class ShardWriter:
+    """
+    Writes records to a JSONL shard as orjson-encoded lines.
+
+    Records are serialized on write() but only handed to the file when
+    flush() is called, with one write() for the whole batch.
+    """
+
+    def __init__(self, path: str, mode: str = "ab"):
+        self.path = path
+        self._file = open(path, mode, buffering=WRITE_BUFFER_SIZE)
+        self._pending = []
+
+    def write(self, record: dict) -> None:
+        """Serializes a record and queues it for the next flush."""
+        self._pending.append(orjson.dumps(record) + b"\n")
+
+    def flush(self) -> None:
+        """Writes all queued records to the shard file."""
+        if self._pending:
+            self._file.write(b"".join(self._pending))
+            self._pending.clear()
+        self._file.flush()
+
+    def close(self) -> None:
+        """Flushes queued records and closes the shard file."""
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> "ShardWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ShardedWriter:
+    """
+    Writes records across consecutive shards of a bounded size.
+
+    Rotation to the next shard happens inside write(), right before a record
+    would overflow the current shard, so callers can batch and flush records
+    without tracking shard boundaries. Closing a full shard flushes it.
+    """
+
+    def __init__(self, data_dir: str, index: int, count: int, records_per_shard: int):
+        """
+        Args:
+            data_dir: The directory containing the shards.
+            index: The index of the shard to append to.
+            count: The number of records already in that shard.
+            records_per_shard: The maximum number of records per shard.
+        """
+        self.data_dir = data_dir
+        self.index = index
+        self.count = count
+        self.records_per_shard = records_per_shard
+        self._writer = self._open("ab")
+
+    def _open(self, mode: str) -> ShardWriter:
+        writer = ShardWriter(os.path.join(self.data_dir, shard_filename(self.index)), mode)
+        save_latest_shard(self.data_dir, self.index)
+        return writer
+
+    def _rotate(self) -> None:
+        """Closes the current shard and moves on to the next free index."""
+        self._writer.close()
+        self.count = 0
+        while True:
+            self.index += 1
+            try:
+                # "xb" refuses to open a shard that already exists, so a run
+                # started from a stale index skips saved shards instead of
+                # truncating them.
+                self._writer = self._open("xb")
+                return
+            except FileExistsError:
+                continue
+
+    def write(self, record: dict) -> None:
+        """Queues a record, first rotating to a new shard if the current one is full."""
+        if self.count >= self.records_per_shard:
+            self._rotate()
+        self._writer.write(record)
+        self.count += 1
+
+    def flush(self) -> None:
+        """Writes all queued records to the current shard."""
+        self._writer.flush()
+
+    def close(self) -> None:
+        """Flushes queued records and closes the current shard."""
+        self._writer.close()
+
+    def __enter__(self) -> "ShardedWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def is_lfs_pointer(path: str) -> bool:
+    """Returns whether a shard file is a Git LFS pointer rather than its content."""
+    with open(path, "rb") as f:
+        return f.read(len(LFS_POINTER_PREFIX)) == LFS_POINTER_PREFIX
+
+
+def iter_shard_urls(data_dir: str) -> Iterator[str]:
+    """
+    Yields the URL of every record in the readable shards of data_dir.
+
+    Git LFS pointer files and lines that are not complete JSON records (e.g. a
+    record cut off by an interrupted run) are skipped.
+
+    Args:
+        data_dir: The directory containing the shards.
+
+    Yields:
+        The "URL" field of each record, in shard order.
+    """
+    shards = sorted(
+        f for f in os.listdir(data_dir) if f.startswith(SHARD_PREFIX) and f.endswith(SHARD_SUFFIX)
+    )
+    for name in shards:
+        path = os.path.join(data_dir, name)
+        if is_lfs_pointer(path):
+            continue
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    url = orjson.loads(line).get("URL")
+                except (orjson.JSONDecodeError, AttributeError):
+                    continue
+                if url:
+                    yield url
+
+
+def count_shard_records(path: str) -> int:
+    """
+    Counts the records in a shard without parsing them.
+
+    Newlines are counted in 1 MiB chunks with bytes.count, which runs in C.
+
+    Args:
+        path: The path of the shard file.
+
+    Returns:
+        The number of records in the shard.
+
+    Raises:
+        ValueError: If the file is not a JSONL shard (e.g. a Git LFS pointer)
+            or ends with an incomplete record.
+    """
+    count = 0
+    last_byte = b"\n"
+    with open(path, "rb") as f:
+        chunk = f.read(1024 * 1024)
+        if chunk and not chunk.startswith(b"{"):
+            raise ValueError("file does not start with a JSON record")
+        while chunk:
+            count += chunk.count(b"\n")
+            last_byte = chunk[-1:]
+            chunk = f.read(1024 * 1024)
+    if last_byte != b"\n":
+        raise ValueError("file ends with an incomplete record")
+    return count
+
+
+def shard_filename(index: int) -> str:
+    """Returns the file name of the shard with the given index."""
+    return f"{SHARD_PREFIX}{index:03d}{SHARD_SUFFIX}"
+
+
+def find_latest_shard(data_dir: str) -> Optional[str]:
+    """
+    Finds the shard that new records should be appended to.
+
+    The index stored in the sidecar file is used when it names an existing
+    shard and no shard follows it. Otherwise, e.g. for data written before
+    the sidecar existed or a stale sidecar, the directory is scanned for the
+    highest shard. A shard found after a gap is never overwritten, since
+    ShardedWriter only rotates into shard files that do not exist yet.
+
+    Args:
+        data_dir: The directory containing the shards.
+
+    Returns:
+        The file name of the latest shard, or None if there are no shards.
+    """
+    try:
+        with open(os.path.join(data_dir, LATEST_SHARD_FILE), "r") as f:
+            index = int(f.read().strip())
+        latest_shard_file = shard_filename(index)
+        if os.path.exists(os.path.join(data_dir, latest_shard_file)) and not os.path.exists(
+            os.path.join(data_dir, shard_filename(index + 1))
+        ):
+            return latest_shard_file
+    except (FileNotFoundError, ValueError):
+        pass
+
+    existing_shards = [
+        f for f in os.listdir(data_dir) if f.startswith(SHARD_PREFIX) and f.endswith(SHARD_SUFFIX)
+    ]
+    if not existing_shards:
+        return None
+    # Sort to ensure we get the highest index
+    existing_shards.sort()
+    return existing_shards[-1]
+
+
+def save_latest_shard(data_dir: str, index: int) -> None:
+    """Records the index of the shard that is currently being written."""
+    with open(os.path.join(data_dir, LATEST_SHARD_FILE), "w") as f:
+        f.write(f"{index}\n")
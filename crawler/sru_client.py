@@ -1,85 +1,254 @@
 # crawler/sru_client.py
 # This module handles all SRU 2.0 protocol communication.
 
-from typing import Iterator, Dict, Any
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterator, List, Tuple
 
 import requests
+import urllib3
+from lxml import etree
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 
+# Size of the keep-alive connection pool per host. It must cover the download
+# threads plus the SRU prefetch threads; otherwise urllib3 discards surplus
+# connections after each request and the next one pays a fresh TCP and TLS
+# handshake.
+POOL_MAXSIZE = 32
+
+
+# Request budget towards repository.overheid.nl, shared by all threads. Bursts
+# up to RATE_LIMIT_BURST requests pass immediately; beyond that requests are
+# spaced out to RATE_LIMIT_PER_SECOND.
+RATE_LIMIT_PER_SECOND = 10.0
+RATE_LIMIT_BURST = 20
+
+
+class RateLimiter:
+    """A thread-safe token bucket."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        """Blocks until the caller may send its next request."""
+        with self._lock:
+            self._refill()
+            # Taking the token up front reserves the caller's slot, so
+            # concurrent callers queue behind each other instead of racing.
+            self._tokens -= 1
+            wait = -self._tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Holds back every caller for at least the given number of seconds."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class SRUError(Exception):
+    """Raised when paging through the SRU results ends before the last page."""
+
+
+LIMITER = RateLimiter(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+
+# Pause applied to all threads when the server answers 429 or 503 without a
+# Retry-After header.
+THROTTLE_PAUSE = 5.0
+# Upper bound on a server-requested pause. A single far-off Retry-After would
+# otherwise stall every download thread and the SRU prefetch for that long.
+MAX_THROTTLE_PAUSE = 60.0
+
+
+class _ThrottlingRetry(Retry):
+    """
+    A Retry policy that also slows down the rest of the crawler.
+
+    urllib3 only makes the thread whose request was rejected wait before its
+    retry. When the server signals overload, the shared limiter is paused as
+    well, so the other download threads back off instead of piling on.
+    """
+
+    def get_retry_after(self, response):
+        # Also used by urllib3 for the rejected thread's own sleep, so both
+        # waits are capped.
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, MAX_THROTTLE_PAUSE)
+
+    def increment(
+        self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None
+    ):
+        if response is not None and response.status in (429, 503):
+            LIMITER.pause(self.get_retry_after(response) or THROTTLE_PAUSE)
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
 def get_session() -> requests.Session:
     """Return a requests session with retry policy for transient errors."""
-    retries = Retry(
+    retries = _ThrottlingRetry(
         total=5,
         backoff_factor=1,
+        backoff_jitter=1,
         status_forcelist=[429, 500, 502, 503, 504],
         allowed_methods=["GET"],
     )
     session = requests.Session()
-    adapter = HTTPAdapter(max_retries=retries)
+    adapter = HTTPAdapter(max_retries=retries, pool_maxsize=POOL_MAXSIZE)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
 
 
-_SESSION = get_session()
+# Shared by the SRU pager and the full-text downloads in crawler.parser, so
+# both reuse the same pool of keep-alive connections to repository.overheid.nl.
+SESSION = get_session()
 
 BASE_URL = "https://repository.overheid.nl/sru"
-PAGE_SIZE = 100 # As per SRU documentation, max is 1000, but we'll use a smaller size
+# The SRU maximum. Pages are stream-parsed, so a large page costs no extra
+# memory while parsing, and ten times fewer page requests count against the
+# shared rate limit.
+PAGE_SIZE = 1000
+# Number of SRU pages requested concurrently ahead of the consumer. One page
+# already covers minutes of downloads at the rate limit.
+PREFETCH_PAGES = 2
 
-def get_records(query: str, start_date: str = None) -> Iterator[Dict[str, Any]]:
+# Namespaces of the SRU 2.0 response envelope and the gzd record schema.
+NS = {
+    'sru': 'http://docs.oasis-open.org/ns/search-ws/sruResponse',
+    'gzd': 'http://standaarden.overheid.nl/sru',
+}
+
+_RECORD_TAG = '{%s}record' % NS['sru']
+_NUMBER_OF_RECORDS_TAG = '{%s}numberOfRecords' % NS['sru']
+
+
+def parse_records(source: BinaryIO) -> Tuple[List[etree._Element], int]:
+    """
+    Stream-parses an SRU response and collects its sru:record elements.
+
+    Each record is detached from the envelope as soon as it has been parsed,
+    so the response tree does not accumulate the whole page and the returned
+    elements are independent of each other.
+
+    Args:
+        source: A binary file-like object containing the SRU response.
+
+    Returns:
+        The records in document order and the total number of records
+        matching the query.
+    """
+    records = []
+    total = 0
+    for _, element in etree.iterparse(
+        source,
+        events=('end',),
+        tag=(_RECORD_TAG, _NUMBER_OF_RECORDS_TAG),
+        huge_tree=True,
+        resolve_entities=False,
+        no_network=True,
+        collect_ids=False,
+        remove_blank_text=True,
+    ):
+        if element.tag == _NUMBER_OF_RECORDS_TAG:
+            total = int(element.text)
+            continue
+        element.getparent().remove(element)
+        records.append(element)
+    return records, total
+
+def _fetch_page(query: str, start_record: int) -> Tuple[List[etree._Element], int]:
+    """
+    Fetches and parses a single page of records from the SRU endpoint.
+
+    Args:
+        query: The full CQL query.
+        start_record: The 1-based position of the first record on the page.
+
+    Returns:
+        The records on the page and the total number of matching records.
+    """
+    params = {
+        'operation': 'searchRetrieve',
+        'version': '2.0',
+        'query': query,
+        'startRecord': start_record,
+        'maximumRecords': PAGE_SIZE,
+        'recordSchema': 'gzd',
+        'httpAccept': 'application/xml',
+    }
+
+    LIMITER.acquire()
+    with SESSION.get(BASE_URL, params=params, stream=True) as response:
+        response.raise_for_status()
+        # Parse straight from the socket instead of buffering the page first;
+        # urllib3 undoes any Content-Encoding as lxml reads.
+        response.raw.decode_content = True
+        return parse_records(response.raw)
+
+def get_records(query: str, start_date: str = None) -> Iterator[etree._Element]:
     """
     Fetches records from the SRU endpoint using pagination.
 
+    Once the first page has reported the total number of records, up to
+    PREFETCH_PAGES following pages are requested concurrently in the
+    background while the records of the current page are being consumed.
+
     Args:
         query: The base CQL query.
         start_date: An optional ISO 8601 date string to get modified records.
 
     Yields:
-        A dictionary representing a single record from the SRU response.
+        The sru:record element of each record in the SRU response.
+
+    Raises:
+        SRUError: If a page could not be fetched or parsed. Records of the
+            pages before it have been yielded already.
     """
     start_record = 1
     
     if start_date:
         query = f"({query}) AND dt.modified>={start_date}"
 
-    while True:
-        params = {
-            'operation': 'searchRetrieve',
-            'version': '2.0',
-            'query': query,
-            'startRecord': start_record,
-            'maximumRecords': PAGE_SIZE,
-            'recordSchema': 'gzd',
-            'httpAccept': 'application/xml',
-        }
-        
-        try:
-            response = _SESSION.get(BASE_URL, params=params)
-            response.raise_for_status()
-            
-            import xmltodict
-            data = xmltodict.parse(response.content)
-            
-            search_retrieve_response = data.get('sru:searchRetrieveResponse', {})
-            records = search_retrieve_response.get('sru:records', {}).get('sru:record', [])
+    with ThreadPoolExecutor(max_workers=PREFETCH_PAGES) as executor:
+        pages = deque([executor.submit(_fetch_page, query, start_record)])
+        start_record += PAGE_SIZE
+        while pages:
+            try:
+                records, total = pages.popleft().result()
+            # Pages are parsed straight from the socket, so a dropped
+            # connection surfaces from inside lxml as a urllib3 error rather
+            # than a requests one.
+            except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
+                raise SRUError(f"Error fetching data from SRU endpoint: {e}") from e
+            except (etree.XMLSyntaxError, ValueError) as e:
+                raise SRUError(f"An error occurred while processing SRU response: {e}") from e
 
             if not records:
                 break
-            
-            # If there's only one record, it's not in a list
-            if not isinstance(records, list):
-                records = [records]
+
+            # Never ask for a page beyond the total, which saves a round-trip
+            # for the empty page after the last one. Without a numberOfRecords
+            # in the response, paging goes on until a page comes back empty.
+            while len(pages) < PREFETCH_PAGES and (not total or start_record <= total):
+                pages.append(executor.submit(_fetch_page, query, start_record))
+                start_record += PAGE_SIZE
 
             for record in records:
                 yield record
-
-            start_record += PAGE_SIZE
-
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching data from SRU endpoint: {e}")
-            break
-        except Exception as e:
-            print(f"An error occurred while processing SRU response: {e}")
-            break
@@ -0,0 +1,68 @@
+# crawler/visited.py
+# Tracks which rulings have already been saved so they are not fetched again.
+
+import os
+from typing import Iterable, Set
+
+import xxhash
+
+
+def _fingerprint_bytes(data: bytes) -> int:
+    """Hashes a UTF-8 encoded URL; the only place the hash function is chosen."""
+    return xxhash.xxh3_64_intdigest(data)
+
+
+def url_fingerprint(url: str) -> int:
+    """Returns the 64-bit fingerprint under which a URL is kept in memory."""
+    return _fingerprint_bytes(url.encode("utf-8"))
+
+
+def load_visited(path: str) -> Set[int]:
+    """
+    Loads the visited log into a set of URL fingerprints.
+
+    The log on disk keeps the plain URLs for inspection; in memory only their
+    8-byte fingerprints are held, which keeps the set small and cheap to probe.
+
+    Args:
+        path: The path of the visited log.
+
+    Returns:
+        The fingerprints of all logged URLs, or an empty set if there is no log.
+    """
+    if not os.path.exists(path):
+        return set()
+    # The log is UTF-8, so its raw lines are exactly the bytes url_fingerprint
+    # hashes; reading it in binary skips decoding and re-encoding every URL.
+    with open(path, "rb") as f:
+        return {_fingerprint_bytes(line) for line in f.read().splitlines() if line}
+
+
+class VisitedLog:
+    """
+    Appends newly saved URLs to the visited log.
+
+    The log is opened once per run with O_APPEND, and each batch of URLs is
+    encoded and handed to the kernel in a single write, so batches land at the
+    end of the log whole without reopening the file for every flush.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def append(self, urls: Iterable[str]) -> None:
+        """Appends a batch of URLs to the log."""
+        data = memoryview("".join(url + "\n" for url in urls).encode("utf-8"))
+        while data:
+            data = data[os.write(self._fd, data):]
+
+    def close(self) -> None:
+        """Closes the log."""
+        os.close(self._fd)
+
+    def __enter__(self) -> "VisitedLog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
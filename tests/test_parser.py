@@ -0,0 +1,46 @@
+import pytest
+from lxml import etree
+
+from crawler import parser
+from crawler.parser import extract_text
+from crawler.visited import url_fingerprint
+
+
+def test_extract_text_concatenates_text_in_document_order():
+    xml = (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<uitspraak xmlns:x="urn:x">De <!-- opmerking --><b>klager</b> en'
+        "<?pi ?><x:p>verweerder</x:p>\n<p><![CDATA[één & twee]]></p></uitspraak>"
+    ).encode("utf-8")
+    expected = "De klager enverweerder\néén & twee"
+    assert extract_text([xml]) == expected
+    # Chunk boundaries may fall anywhere, including inside a UTF-8 sequence.
+    assert extract_text(xml[i : i + 7] for i in range(0, len(xml), 7)) == expected
+
+
+def test_extract_text_rejects_malformed_xml():
+    with pytest.raises(etree.XMLSyntaxError):
+        extract_text([b"<uitspraak><p>open</uitspraak>"])
+
+
+RECORD = b"""<sru:record xmlns:sru="http://docs.oasis-open.org/ns/search-ws/sruResponse"
+    xmlns:gzd="http://standaarden.overheid.nl/sru">
+  <sru:recordData><gzd:gzd><gzd:enrichedData>
+    <gzd:url>https://example.org/1</gzd:url>
+    <gzd:itemUrl manifestation="pdf">https://example.org/1.pdf</gzd:itemUrl>
+    <gzd:itemUrl manifestation="xml"> https://example.org/1.xml </gzd:itemUrl>
+  </gzd:enrichedData></gzd:gzd></sru:recordData>
+</sru:record>"""
+
+
+def test_parse_record_prefers_xml_item_url(monkeypatch):
+    monkeypatch.setattr(parser, "get_full_text", lambda url: f"text of {url}")
+    record = etree.fromstring(RECORD)
+
+    assert parser.parse_record(record) == {
+        "URL": "https://example.org/1.xml",
+        "Content": "text of https://example.org/1.xml",
+        "Source": "Tuchtrecht",
+    }
+    visited = {url_fingerprint("https://example.org/1.xml")}
+    assert parser.parse_record(record, visited=visited) is None
@@ -0,0 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from crawler.pipeline import bounded_map
+
+
+def test_bounded_map_preserves_order():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(bounded_map(executor, lambda x: x * 2, range(10), 3)) == [
+            x * 2 for x in range(10)
+        ]
+
+
+def test_bounded_map_consumes_input_lazily():
+    consumed = []
+
+    def items():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = bounded_map(executor, lambda x: x, items(), 4)
+        assert [next(results) for _ in range(2)] == [0, 1]
+        results.close()
+    assert len(consumed) <= 6
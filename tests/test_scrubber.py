@@ -5,6 +5,7 @@ from crawler.scrubber import (
     scrub_party_names,
     scrub_courtesy_names,
     scrub_gemachtigde_names,
+    scrub_text,
 )
 
 
@@ -54,3 +55,10 @@ def test_scrub_courtesy_names(input_text, expected):
 )
 def test_scrub_gemachtigde_names(input_text, expected):
     assert scrub_gemachtigde_names(input_text) == expected
+
+
+def test_scrub_text_passes_see_earlier_replacements():
+    # The party pass must run on the output of the title pass; a single
+    # combined scan would consume "mr." as the party name and leave the
+    # actual name behind.
+    assert scrub_text("Volgens klager mr. Jansen is dat zo.") == "Volgens klager NAAM NAAM zo."
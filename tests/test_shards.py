@@ -0,0 +1,126 @@
+import pytest
+
+from crawler.shards import (
+    ShardedWriter,
+    ShardWriter,
+    count_shard_records,
+    find_latest_shard,
+    is_lfs_pointer,
+    iter_shard_urls,
+    save_latest_shard,
+    shard_filename,
+)
+
+
+def test_shard_writer_appends_jsonl(tmp_path):
+    path = tmp_path / "tuchtrecht_shard_000.jsonl"
+    with ShardWriter(str(path)) as writer:
+        writer.write({"URL": "a", "Content": "één"})
+        writer.write({"URL": "b", "Content": "twee"})
+    with ShardWriter(str(path)) as writer:
+        writer.write({"URL": "c", "Content": "drie"})
+
+    assert path.read_text(encoding="utf-8").splitlines() == [
+        '{"URL":"a","Content":"één"}',
+        '{"URL":"b","Content":"twee"}',
+        '{"URL":"c","Content":"drie"}',
+    ]
+    assert count_shard_records(str(path)) == 3
+
+
+def test_count_shard_records_empty(tmp_path):
+    path = tmp_path / "empty.jsonl"
+    path.write_bytes(b"")
+    assert count_shard_records(str(path)) == 0
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"version https://git-lfs.github.com/spec/v1\noid sha256:abc\nsize 1\n",
+        b'{"URL":"a"}\n{"URL":',
+    ],
+)
+def test_count_shard_records_rejects_invalid_shards(tmp_path, content):
+    path = tmp_path / "invalid.jsonl"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        count_shard_records(str(path))
+
+
+def test_is_lfs_pointer(tmp_path):
+    pointer = tmp_path / "tuchtrecht_shard_000.jsonl"
+    pointer.write_text(
+        "version https://git-lfs.github.com/spec/v1\noid sha256:abc\nsize 12\n"
+    )
+    shard = tmp_path / "tuchtrecht_shard_001.jsonl"
+    shard.write_text('{"URL": "a"}\n')
+
+    assert is_lfs_pointer(str(pointer))
+    assert not is_lfs_pointer(str(shard))
+
+
+def test_iter_shard_urls_skips_pointers_and_partial_records(tmp_path):
+    (tmp_path / shard_filename(0)).write_text(
+        "version https://git-lfs.github.com/spec/v1\noid sha256:abc\nsize 12\n"
+    )
+    (tmp_path / shard_filename(1)).write_text('{"URL": "a"}\n{"URL": "b"}\n')
+    (tmp_path / shard_filename(2)).write_text('{"URL": "c"}\n{"URL": "d", "Con')
+    (tmp_path / "visited.txt").write_text("x\n")
+
+    assert list(iter_shard_urls(str(tmp_path))) == ["a", "b", "c"]
+
+
+def test_find_latest_shard_uses_sidecar(tmp_path):
+    for index in (0, 1):
+        (tmp_path / shard_filename(index)).write_bytes(b"")
+    assert find_latest_shard(str(tmp_path)) == shard_filename(1)
+
+
+def test_sharded_writer_skips_shards_after_a_gap(tmp_path):
+    (tmp_path / shard_filename(0)).write_bytes(b'{"URL":"0"}\n')
+    (tmp_path / shard_filename(1)).write_bytes(b'{"URL":"1"}\n')
+    (tmp_path / shard_filename(3)).write_bytes(b'{"URL":"3"}\n')
+    save_latest_shard(str(tmp_path), 1)
+    assert find_latest_shard(str(tmp_path)) == shard_filename(1)
+
+    with ShardedWriter(str(tmp_path), 1, 1, records_per_shard=2) as writer:
+        for i in range(5):
+            writer.write({"URL": f"new{i}"})
+
+    # Shard 3 was saved before this run and must keep its record.
+    assert (tmp_path / shard_filename(3)).read_bytes() == b'{"URL":"3"}\n'
+    assert count_shard_records(str(tmp_path / shard_filename(1))) == 2
+    assert count_shard_records(str(tmp_path / shard_filename(2))) == 2
+    assert count_shard_records(str(tmp_path / shard_filename(4))) == 2
+    assert find_latest_shard(str(tmp_path)) == shard_filename(4)
+
+
+def test_find_latest_shard_ignores_stale_sidecar(tmp_path):
+    for index in (0, 1, 2):
+        (tmp_path / shard_filename(index)).write_bytes(b"")
+
+    # A stale hint is not used, so new records go after the highest shard.
+    save_latest_shard(str(tmp_path), 1)
+    assert find_latest_shard(str(tmp_path)) == shard_filename(2)
+
+    save_latest_shard(str(tmp_path), 7)
+    assert find_latest_shard(str(tmp_path)) == shard_filename(2)
+
+
+def test_find_latest_shard_without_shards(tmp_path):
+    assert find_latest_shard(str(tmp_path)) is None
+
+
+def test_sharded_writer_rotates_full_shards(tmp_path):
+    (tmp_path / shard_filename(0)).write_bytes(b'{"URL":"old"}\n')
+
+    with ShardedWriter(str(tmp_path), 0, 1, records_per_shard=2) as writer:
+        for i in range(4):
+            writer.write({"URL": str(i)})
+
+    assert count_shard_records(str(tmp_path / shard_filename(0))) == 2
+    assert count_shard_records(str(tmp_path / shard_filename(1))) == 2
+    assert count_shard_records(str(tmp_path / shard_filename(2))) == 1
+    assert not (tmp_path / shard_filename(3)).exists()
+    assert find_latest_shard(str(tmp_path)) == shard_filename(2)
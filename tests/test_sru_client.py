@@ -0,0 +1,139 @@
+from io import BytesIO
+
+import pytest
+import urllib3
+
+from crawler import sru_client
+from crawler.sru_client import RateLimiter
+
+
+def test_rate_limiter_allows_burst_then_spaces_requests(monkeypatch):
+    clock = [100.0]
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(sru_client.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(sru_client.time, "sleep", fake_sleep)
+
+    limiter = RateLimiter(rate=2.0, burst=3)
+    for _ in range(3):
+        limiter.acquire()
+    assert sleeps == []
+
+    limiter.acquire()
+    limiter.acquire()
+    assert sleeps == [0.5, 0.5]
+
+
+def test_rate_limiter_pause_holds_back_next_request(monkeypatch):
+    clock = [100.0]
+    sleeps = []
+    monkeypatch.setattr(sru_client.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(sru_client.time, "sleep", sleeps.append)
+
+    limiter = RateLimiter(rate=2.0, burst=3)
+    limiter.pause(5.0)
+    limiter.acquire()
+
+    assert sleeps == [5.5]
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [({"Retry-After": "3600"}, 60.0), ({"Retry-After": "2"}, 2.0), ({}, 5.0)],
+)
+def test_throttling_retry_pauses_limiter(monkeypatch, headers, expected):
+    pauses = []
+    monkeypatch.setattr(sru_client.LIMITER, "pause", pauses.append)
+    retry = sru_client._ThrottlingRetry(total=5, status_forcelist=[429])
+    response = urllib3.HTTPResponse(status=429, headers=headers)
+
+    retry.increment("GET", "/sru", response=response)
+
+    assert pauses == [expected]
+    assert retry.get_retry_after(response) == (expected if headers else None)
+
+
+SRU_PAGE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sru:searchRetrieveResponse xmlns:sru="http://docs.oasis-open.org/ns/search-ws/sruResponse"
+    xmlns:gzd="http://standaarden.overheid.nl/sru">
+  <sru:numberOfRecords>2</sru:numberOfRecords>
+  <sru:records>
+    <sru:record><sru:recordData><gzd:gzd><gzd:enrichedData>
+      <gzd:url>https://example.org/1</gzd:url>
+    </gzd:enrichedData></gzd:gzd></sru:recordData></sru:record>
+    <sru:record><sru:recordData><gzd:gzd><gzd:enrichedData>
+      <gzd:url>https://example.org/2</gzd:url>
+    </gzd:enrichedData></gzd:gzd></sru:recordData></sru:record>
+  </sru:records>
+</sru:searchRetrieveResponse>
+"""
+
+
+def test_parse_records_detaches_records_in_order():
+    records, total = sru_client.parse_records(BytesIO(SRU_PAGE))
+
+    assert total == 2
+    urls = [r.findtext(".//gzd:url", namespaces=sru_client.NS) for r in records]
+    assert urls == ["https://example.org/1", "https://example.org/2"]
+    assert all(r.getparent() is None for r in records)
+
+
+def test_parse_records_empty_page():
+    page = (
+        b'<sru:searchRetrieveResponse xmlns:sru="http://docs.oasis-open.org/ns/search-ws/sruResponse">'
+        b"<sru:numberOfRecords>0</sru:numberOfRecords></sru:searchRetrieveResponse>"
+    )
+    assert sru_client.parse_records(BytesIO(page)) == ([], 0)
+
+
+def test_get_records_pages_up_to_total(monkeypatch):
+    requested = []
+
+    def fake_fetch_page(query, start_record):
+        requested.append(start_record)
+        end = min(start_record + sru_client.PAGE_SIZE, 251)
+        return list(range(start_record, end)), 250
+
+    monkeypatch.setattr(sru_client, "PAGE_SIZE", 100)
+    monkeypatch.setattr(sru_client, "_fetch_page", fake_fetch_page)
+
+    assert list(sru_client.get_records("q")) == list(range(1, 251))
+    assert sorted(requested) == [1, 101, 201]
+
+
+def test_get_records_pages_until_empty_without_total(monkeypatch):
+    page = SRU_PAGE.replace(b"<sru:numberOfRecords>2</sru:numberOfRecords>", b"")
+    empty = (
+        b'<sru:searchRetrieveResponse xmlns:sru="http://docs.oasis-open.org/ns/search-ws/sruResponse"/>'
+    )
+    requested = []
+
+    def fake_fetch_page(query, start_record):
+        requested.append(start_record)
+        return sru_client.parse_records(BytesIO(page if start_record < 5 else empty))
+
+    monkeypatch.setattr(sru_client, "PAGE_SIZE", 2)
+    monkeypatch.setattr(sru_client, "_fetch_page", fake_fetch_page)
+
+    assert len(list(sru_client.get_records("q"))) == 4
+    assert 5 in requested
+
+
+def test_get_records_raises_when_a_page_breaks_off(monkeypatch):
+    def fake_fetch_page(query, start_record):
+        if start_record > 1:
+            raise urllib3.exceptions.ProtocolError("Connection broken")
+        return list(range(1, 101)), 250
+
+    monkeypatch.setattr(sru_client, "PAGE_SIZE", 100)
+    monkeypatch.setattr(sru_client, "_fetch_page", fake_fetch_page)
+
+    received = []
+    with pytest.raises(sru_client.SRUError):
+        for record in sru_client.get_records("q"):
+            received.append(record)
+    assert received == list(range(1, 101))
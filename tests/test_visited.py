@@ -0,0 +1,30 @@
+from crawler.visited import VisitedLog, load_visited, url_fingerprint
+
+
+def test_visited_round_trip(tmp_path):
+    path = tmp_path / "visited.txt"
+    assert load_visited(str(path)) == set()
+
+    with VisitedLog(str(path)) as log:
+        log.append(["https://example.org/a", "https://example.org/b"])
+        log.append([])
+    with VisitedLog(str(path)) as log:
+        log.append(["https://example.org/c"])
+
+    visited = load_visited(str(path))
+    assert visited == {
+        url_fingerprint("https://example.org/a"),
+        url_fingerprint("https://example.org/b"),
+        url_fingerprint("https://example.org/c"),
+    }
+    assert url_fingerprint("https://example.org/d") not in visited
+
+
+def test_load_visited_matches_fingerprints_of_non_ascii_urls(tmp_path):
+    path = tmp_path / "visited.txt"
+    path.write_bytes("https://example.org/é\r\nhttps://example.org/b\n".encode("utf-8"))
+
+    assert load_visited(str(path)) == {
+        url_fingerprint("https://example.org/é"),
+        url_fingerprint("https://example.org/b"),
+    }